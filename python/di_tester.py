@@ -0,0 +1,533 @@
+import asyncio
+import functools
+import hashlib
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from azure.ai.documentintelligence import DocumentIntelligenceClient
+from azure.ai.documentintelligence.aio import (
+    DocumentIntelligenceClient as AsyncDocumentIntelligenceClient,
+)
+from azure.core.credentials import AzureKeyCredential
+from dotenv import load_dotenv
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+# Load environment variables
+load_dotenv()
+
+# Output folder for content and report files
+RESULTS_DIR = Path("results")
+
+# Azure DI prebuilt-layout price per page in USD, used for budget estimates
+PRICE_PER_PAGE = 0.01
+
+# LRO status-poll interval in seconds; short because the test documents are
+# small PDFs that analyze in a few seconds, so the default interval would
+# leave finished operations sitting unharvested
+POLLING_INTERVAL = 2
+
+
+def _write_file(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _cache_key(data, output_format):
+    """Cache key for an analyze call: document content hash plus format"""
+    return (hashlib.sha1(data).hexdigest(), output_format)
+
+
+def _estimate_pages(document_path):
+    """Estimates a PDF's page count for cost projection"""
+    if pypdfium2 is not None:
+        return len(pypdfium2.PdfDocument(str(document_path)))
+    # Cheap fallback: count page objects in the raw PDF; PDF allows optional
+    # whitespace between the name tokens, so match both spellings
+    data = Path(document_path).read_bytes()
+    hits = re.findall(rb"/Type\s*/Pages?", data)
+    return max(1, sum(1 for hit in hits if not hit.endswith(b"s")))
+
+# Literal indicators used to classify the returned content
+FORMAT_INDICATORS = {
+    "html": ['<html>', '<div>', '<p>', '<table>', '<tr>', '<td>', '<span>', '<h1>', '<h2>'],
+    "markdown": ['# ', '## ', '### ', '**', '*', '- ', '1. ', '|', '```'],
+    "json": ['{', '}', '":', '["', '"]'],
+}
+
+
+@functools.lru_cache()
+def _get_client(endpoint, key):
+    """Shared DocumentIntelligenceClient so repeated instantiations reuse one
+    pipeline, transport and pooled keep-alive connection"""
+    return DocumentIntelligenceClient(
+        endpoint=endpoint,
+        credential=AzureKeyCredential(key),
+        retry_total=3,
+        retry_backoff_factor=1.0
+    )
+
+
+def _build_indicator_automaton():
+    """Builds one Aho-Corasick automaton over all format indicators"""
+    automaton = ahocorasick.Automaton()
+    for category, tokens in FORMAT_INDICATORS.items():
+        for token in tokens:
+            automaton.add_word(token, (category, token))
+            # HTML tags get an upper-case variant so the automaton can run
+            # over the original content without a casefold() copy
+            if category == "html":
+                automaton.add_word(token.upper(), (category, token))
+    automaton.make_automaton()
+    return automaton
+
+class DocumentIntelligenceTest:
+    # Compiled once at class load so _detect_format does a single pass per
+    # category instead of one scan per indicator; bytes patterns because the
+    # fallback scans a UTF-8 view of the content, which searches raw bytes
+    # instead of walking the (potentially wide) unicode representation
+    HTML_RE = re.compile(rb"<(?:html|div|p|table|tr|td|span|h[12])>", re.IGNORECASE)
+    # Alternatives ordered by expected frequency so the common case matches
+    # early (table pipes and bold markers dominate layout output)
+    MARKDOWN_RE = re.compile(rb"\||\*\*|\*|^#{1,3} |^- |^1\. |```", re.MULTILINE)
+    # Multi-character JSON tokens only; the brace counts come from a single
+    # C-level Counter pass in _detect_format
+    JSON_PAIR_RE = re.compile(rb"\":|\[\"|\"\]")
+
+    # Single automaton over all indicators: classifies the content in one
+    # O(N) pass instead of one pass per category (regexes stay as fallback)
+    INDICATOR_AUTOMATON = _build_indicator_automaton() if ahocorasick else None
+
+    def __init__(self):
+        self.endpoint = os.getenv("DOCUMENT_INTELLIGENCE_ENDPOINT")
+        self.key = os.getenv("DOCUMENT_INTELLIGENCE_KEY")
+        
+        if not self.endpoint or not self.key:
+            raise ValueError("Missing environment variables. Check the .env file")
+        
+        self.client = _get_client(self.endpoint, self.key)
+        RESULTS_DIR.mkdir(exist_ok=True)
+
+        # Result files are written in the background so disk I/O overlaps
+        # with the next Azure round trip
+        self._io_pool = ThreadPoolExecutor(max_workers=2)
+        self._pending_writes = []
+
+        # Memoized analyze results keyed by (sha1(document), output_format),
+        # so re-analyzing the same document/format pair costs no Azure call
+        self._cache = {}
+
+        # Output formats the installed SDK accepts, detected lazily
+        self._supported_formats = None
+
+        # Pages sent to Azure so far, for budget estimates
+        self._pages_billed = 0
+
+    def _get_supported_formats(self):
+        """Detects once which output formats the installed SDK supports, so
+        comparisons skip formats that would only round-trip to a fallback"""
+        if self._supported_formats is None:
+            formats = {"default"}
+            try:
+                from azure.ai.documentintelligence.models import DocumentContentFormat
+                formats |= {member.value.lower() for member in DocumentContentFormat}
+            except ImportError:
+                try:
+                    from azure.ai.documentintelligence.models import ContentFormat
+                    formats |= {member.value.lower() for member in ContentFormat}
+                except ImportError:
+                    formats |= {"markdown", "text"}
+            self._supported_formats = formats
+        return self._supported_formats
+    
+    def analyze_document(self, document_path, output_format="default", *, _bytes=None):
+        """
+        Analyzes a document with different output formats
+
+        Args:
+            document_path: Document path
+            output_format: "default", "markdown", "text", "html"
+            _bytes: Optional in-memory copy of the document; skips the disk read
+        """
+        print(f"\n🔍 Analyzing: {document_path}")
+        print(f"📋 Requested format: {output_format}")
+
+        try:
+            if _bytes is None:
+                _bytes = Path(document_path).read_bytes()
+
+            cache_key = _cache_key(_bytes, output_format)
+            if cache_key in self._cache:
+                print("♻️ Reusing cached result (no Azure call)")
+                return self._cache[cache_key]
+
+            # Configure parameters according to desired format
+            analyze_params = {
+                "model_id": "prebuilt-layout",
+                "analyze_request": _bytes,
+                "content_type": "application/octet-stream",
+                "polling_interval": POLLING_INTERVAL
+            }
+
+            # Add specific parameters according to format
+            if output_format == "markdown":
+                analyze_params["output_content_format"] = "markdown"
+            elif output_format == "text":
+                analyze_params["output_content_format"] = "text"
+            elif output_format == "html":
+                # Some API versions support HTML
+                analyze_params["output_content_format"] = "html"
+
+            print("⏳ Sending request to Azure...")
+            try:
+                poller = self.client.begin_analyze_document(**analyze_params)
+            except Exception as param_error:
+                print(f"⚠️ Error with specific parameters: {param_error}")
+                print("🔄 Trying with default parameters...")
+                # Fallback to default parameters
+                poller = self.client.begin_analyze_document(
+                    "prebuilt-layout",
+                    analyze_request=_bytes,
+                    content_type="application/octet-stream",
+                    polling_interval=POLLING_INTERVAL
+                )
+
+            print("⏳ Processing document...")
+            result = poller.result()
+            
+            # Content analysis
+            content = result.content
+            format_detected = self._detect_format(content)
+            
+            # Create report (content samples sliced once, here)
+            head, tail = content[:500], content[-500:]
+            report = self._create_report(document_path, len(content), format_detected,
+                                         output_format, head, tail)
+            
+            # Save results
+            self._save_results(document_path, content, report, output_format)
+            
+            print(f"✅ Analysis completed:")
+            print(f"   Requested format: {output_format}")
+            print(f"   Detected format: {format_detected}")
+            self._cache[cache_key] = result
+            self._pages_billed += len(result.pages) if getattr(result, "pages", None) else 1
+            return result
+
+        except Exception as e:
+            print(f"❌ Error processing {document_path}: {e}")
+            return None
+    
+    def _detect_format(self, content):
+        """Detects if content is HTML, Markdown or plain text"""
+        if self.INDICATOR_AUTOMATON is not None:
+            # One pass over the content counting every indicator at once
+            counts = {"html": 0, "markdown": 0, "json": 0}
+            for _, (category, _token) in self.INDICATOR_AUTOMATON.iter(content):
+                counts[category] += 1
+            html_count = counts["html"]
+            markdown_count = counts["markdown"]
+            json_count = counts["json"]
+
+            if html_count > 0:
+                return f"HTML (indicators: {html_count})"
+            elif markdown_count > 2:
+                return f"Markdown (indicators: {markdown_count})"
+            elif json_count > 3:
+                return f"JSON (indicators: {json_count})"
+            else:
+                return "Plain text"
+
+        # Regex fallback: check the categories in decision order and bail on
+        # the first decisive one, skipping the remaining passes entirely.
+        # All indicators are ASCII, so scanning one encoded copy is cheaper
+        # than walking the unicode string several times
+        content_b = content.encode("utf-8", "replace")
+
+        html_count = len(self.HTML_RE.findall(content_b))
+        if html_count > 0:
+            return f"HTML (indicators: {html_count})"
+
+        markdown_count = len(self.MARKDOWN_RE.findall(content_b))
+        if markdown_count > 2:
+            return f"Markdown (indicators: {markdown_count})"
+
+        byte_counts = Counter(content_b)
+        json_count = (byte_counts[ord('{')] + byte_counts[ord('}')]
+                      + len(self.JSON_PAIR_RE.findall(content_b)))
+        if json_count > 3:
+            return f"JSON (indicators: {json_count})"
+
+        return "Plain text"
+    
+    def _create_report(self, document_path, length, format_detected, requested_format,
+                       head, tail):
+        """Creates a detailed analysis report from precomputed content samples;
+        takes no reference to the full content so it can be freed sooner"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        # Collect the pieces and join once instead of growing the report
+        # string with repeated concatenation
+        parts = [f"""
+=== ANALYSIS REPORT ===
+File: {document_path}
+Date: {timestamp}
+Requested format: {requested_format}
+Detected format: {format_detected}
+Content length: {length} characters
+
+=== CONTENT ANALYSIS ===
+"""]
+
+        # Specific analysis by format
+        if "HTML" in format_detected:
+            parts.append("✅ RESULT: Azure returned HTML\n")
+            parts.append("   - HTML tags found\n")
+        elif "Markdown" in format_detected:
+            parts.append("✅ RESULT: Azure returned Markdown\n")
+            parts.append("   - Markdown syntax found\n")
+        elif "JSON" in format_detected:
+            parts.append("✅ RESULT: Azure returned JSON\n")
+            parts.append("   - JSON structure found\n")
+        else:
+            parts.append("ℹ️ RESULT: Plain text or unidentified format\n")
+
+        parts.append(f"""
+=== CONTENT SAMPLE ===
+FIRST 500 CHARACTERS:
+{head}...
+
+LAST 500 CHARACTERS:
+...{tail}
+
+=== MANUAL VERIFICATION ===
+Check the complete file to confirm the format.
+""")
+        return "".join(parts)
+    
+    def _save_results(self, document_path, content, report, output_format, stem=None):
+        """Saves results to files; stem may be precomputed by the caller"""
+        filename = stem if stem is not None else Path(document_path).stem
+
+        # Save complete content with format suffix
+        content_file = RESULTS_DIR / f"{filename}_{output_format}_content.md"
+        self._pending_writes.append(self._io_pool.submit(_write_file, content_file, content))
+
+        # Save report
+        report_file = RESULTS_DIR / f"{filename}_{output_format}_report.md"
+        self._pending_writes.append(self._io_pool.submit(_write_file, report_file, report))
+        
+        print(f"💾 Files saved:")
+        print(f"   - {content_file}")
+        print(f"   - {report_file}")
+
+    def _flush_writes(self):
+        """Waits for all pending result-file writes to finish"""
+        for future in self._pending_writes:
+            future.result()
+        self._pending_writes.clear()
+
+    def analyze_batch(self, document_paths, output_format="default"):
+        """
+        Analyzes several documents concurrently with the requested format
+
+        All pollers are started up front so the documents are processed by
+        Azure in parallel; results are then harvested on a thread pool so the
+        total wall time is the slowest document, not the sum.
+        """
+        print(f"\n📦 BATCH ANALYSIS of {len(document_paths)} documents")
+
+        entries = []
+        for doc_path in document_paths:
+            try:
+                data = Path(doc_path).read_bytes()
+                cache_key = _cache_key(data, output_format)
+                if cache_key in self._cache:
+                    print(f"♻️ Cached result: {doc_path}")
+                    entries.append((doc_path, cache_key, None))
+                    continue
+                print(f"⏳ Sending request to Azure: {doc_path}")
+                analyze_params = {
+                    "model_id": "prebuilt-layout",
+                    "analyze_request": data,
+                    "content_type": "application/octet-stream",
+                    "polling_interval": POLLING_INTERVAL
+                }
+                if output_format in ("markdown", "text", "html"):
+                    analyze_params["output_content_format"] = output_format
+                entries.append((doc_path, cache_key,
+                                self.client.begin_analyze_document(**analyze_params)))
+            except Exception as e:
+                print(f"❌ Error processing {doc_path}: {e}")
+                # Sentinel entry so the document still shows up as failed in
+                # the returned results
+                entries.append((doc_path, None, None))
+
+        def _harvest(entry):
+            doc_path, cache_key, poller = entry
+            if cache_key is None:
+                return None
+            try:
+                return self._cache[cache_key] if poller is None else poller.result()
+            except Exception as e:
+                print(f"❌ Error processing {doc_path}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            outcomes = list(pool.map(_harvest, entries))
+
+        results = {}
+        for (doc_path, cache_key, poller), result in zip(entries, outcomes):
+            if result is None:
+                results[doc_path] = None
+                continue
+            content = result.content
+            format_detected = self._detect_format(content)
+            if poller is not None:
+                # Fresh result: cache it and write the result files
+                self._cache[cache_key] = result
+                self._pages_billed += len(result.pages) if getattr(result, "pages", None) else 1
+                report = self._create_report(doc_path, len(content), format_detected,
+                                             output_format, content[:500], content[-500:])
+                self._save_results(doc_path, content, report, output_format)
+            print(f"✅ {doc_path} -> {format_detected}")
+            results[doc_path] = result
+
+        self._flush_writes()
+        return results
+
+    async def _analyze_document_async(self, client, document_path, data, output_format,
+                                      stem=None):
+        """Async variant of analyze_document that reuses an in-memory PDF buffer"""
+        print(f"\n🔍 Analyzing: {document_path}")
+        print(f"📋 Requested format: {output_format}")
+
+        try:
+            cache_key = _cache_key(data, output_format)
+            if cache_key in self._cache:
+                print("♻️ Reusing cached result (no Azure call)")
+                return self._cache[cache_key]
+
+            # Configure parameters according to desired format
+            analyze_params = {
+                "model_id": "prebuilt-layout",
+                "analyze_request": data,
+                "content_type": "application/octet-stream",
+                "polling_interval": POLLING_INTERVAL
+            }
+
+            # Add specific parameters according to format
+            if output_format in ("markdown", "text", "html"):
+                analyze_params["output_content_format"] = output_format
+
+            print("⏳ Sending request to Azure...")
+            try:
+                poller = await client.begin_analyze_document(**analyze_params)
+            except Exception as param_error:
+                print(f"⚠️ Error with specific parameters: {param_error}")
+                print("🔄 Trying with default parameters...")
+                # Fallback to default parameters
+                poller = await client.begin_analyze_document(
+                    "prebuilt-layout",
+                    analyze_request=data,
+                    content_type="application/octet-stream",
+                    polling_interval=POLLING_INTERVAL
+                )
+
+            print("⏳ Processing document...")
+            result = await poller.result()
+
+            # Content analysis
+            content = result.content
+            format_detected = self._detect_format(content)
+
+            # Create report (content samples sliced once, here)
+            head, tail = content[:500], content[-500:]
+            report = self._create_report(document_path, len(content), format_detected,
+                                         output_format, head, tail)
+
+            # Save results
+            self._save_results(document_path, content, report, output_format, stem=stem)
+
+            print(f"✅ Analysis completed:")
+            print(f"   Requested format: {output_format}")
+            print(f"   Detected format: {format_detected}")
+            self._cache[cache_key] = result
+            self._pages_billed += len(result.pages) if getattr(result, "pages", None) else 1
+            return result
+
+        except Exception as e:
+            print(f"❌ Error processing {document_path}: {e}")
+            return None
+
+    async def _run_format_comparison(self, document_path):
+        supported = self._get_supported_formats()
+        formats_to_test = [fmt for fmt in ["default", "markdown", "text", "html"]
+                           if fmt in supported]
+        for fmt in ["default", "markdown", "text", "html"]:
+            if fmt not in formats_to_test:
+                print(f"⏭️ Skipping '{fmt}': not supported by the installed SDK")
+
+        # Read the PDF once and share the bytes across all requests;
+        # the output stem is likewise computed once for all four saves
+        data = Path(document_path).read_bytes()
+        stem = Path(document_path).stem
+
+        # One async client (and one shared transport) for the four calls
+        async with AsyncDocumentIntelligenceClient(
+            endpoint=self.endpoint,
+            credential=AzureKeyCredential(self.key),
+            retry_total=3,
+            retry_backoff_factor=1.0
+        ) as client:
+            outcomes = await asyncio.gather(
+                *[self._analyze_document_async(client, document_path, data, fmt,
+                                               stem=stem)
+                  for fmt in formats_to_test],
+                return_exceptions=True
+            )
+
+        return dict(zip(formats_to_test, outcomes))
+
+    def run_format_comparison(self, document_path, budget=None):
+        """Runs the same document with different formats concurrently for
+        comparison; refuses to dispatch if the projected spend in USD would
+        exceed budget"""
+        print(f"\n🔬 FORMAT COMPARISON for: {document_path}")
+        print("=" * 60)
+
+        if budget is not None:
+            n_formats = len([fmt for fmt in ["default", "markdown", "text", "html"]
+                             if fmt in self._get_supported_formats()])
+            estimated_cost = ((self._pages_billed
+                               + _estimate_pages(document_path) * n_formats)
+                              * PRICE_PER_PAGE)
+            if estimated_cost > budget:
+                print(f"🛑 Skipped: estimated spend ${estimated_cost:.2f} "
+                      f"exceeds budget ${budget:.2f}")
+                return {}
+
+        results = asyncio.run(self._run_format_comparison(document_path))
+        self._flush_writes()
+
+        print(f"\n📊 COMPARISON SUMMARY:")
+        print("=" * 60)
+        for fmt, result in results.items():
+            if result and not isinstance(result, Exception):
+                format_detected = self._detect_format(result.content)
+                print(f"{fmt:10} -> {format_detected}")
+            else:
+                print(f"{fmt:10} -> ERROR")
+
+        return results